@@ -8,11 +8,22 @@ import os
 import sys
 import json
 import argparse
+import atexit
 import logging
+import logging.handlers
+import queue
+import signal
 import asyncio
+import hashlib
+import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Add the ai directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -20,6 +31,28 @@ from editor import FileEditor
 from executor import CommandExecutor
 from watcher import LogWatcher
 from config import AIConfig
+from cache import SemanticCache
+
+# Kept byte-identical across requests so provider-side prompt caching can
+# reuse the prefix
+SYSTEM_PROMPT = """You are a NixOS AI assistant. You can:
+1. Edit NixOS configuration files
+2. Run system commands
+3. Install packages
+4. Enable services
+
+Respond with JSON containing:
+- action: "edit_file", "run_command", or "unknown"
+- file: path to file (if editing)
+- changes: list of changes (if editing)
+- commands: list of commands to run
+- message: explanation of what you're doing
+
+Be specific and safe. Always validate changes before applying."""
+
+LOG_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
 
 class NixOSAIAgent:
     """Main AI agent for NixOS system management"""
@@ -29,72 +62,89 @@ class NixOSAIAgent:
         self.editor = FileEditor(self.config)
         self.executor = CommandExecutor(self.config)
         self.watcher = LogWatcher(self.config)
+        self.response_cache = SemanticCache(self.config)
+        
+        # Exact-match responses by request hash: (cached_at, response)
+        self._exact_cache = {}
         
         # Set up logging
         self.logger = self._setup_logging()
         
-        # AI client (will be implemented based on config)
-        self.ai_client = self._setup_ai_client()
+        # Log the system prompt hash so prompt cache hits can be checked
+        prompt_hash = hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:16]
+        self.logger.info(f"System prompt hash: {prompt_hash}")
+        
+        # AI client, created on first use so the daemon and startup do not
+        # pay for importing and configuring provider SDKs up front
+        self._ai_client = None
+        self._ai_client_loop = None
+    
+    @property
+    def ai_client(self):
+        """AI client for the configured provider, set up on first access"""
+        # The async SDK clients hold connections bound to the event loop they
+        # were first used on, so each loop gets its own client
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if self._ai_client is None or self._ai_client_loop is not loop:
+            self._ai_client = self._setup_ai_client()
+            self._ai_client_loop = loop
+        return self._ai_client
         
     def _setup_logging(self) -> logging.Logger:
         """Set up logging for the AI agent"""
         logger = logging.getLogger('nixos-ai')
+        
+        # The logger is shared by every agent in the process, so only
+        # attach handlers the first time
+        if logger.handlers:
+            return logger
+        
         logger.setLevel(logging.INFO)
         
         # Create logs directory if it doesn't exist
         log_dir = Path(self.config.ai_dir) / "logs"
         log_dir.mkdir(exist_ok=True)
         
-        # File handler
-        fh = logging.FileHandler(log_dir / "ai.log")
+        # File handler; reopens ai.log after logrotate moves it, which also
+        # works with the daemon and CLI runs writing the same file
+        fh = logging.handlers.WatchedFileHandler(log_dir / "ai.log")
         fh.setLevel(logging.INFO)
         
         # Console handler
         ch = logging.StreamHandler()
         ch.setLevel(logging.INFO)
         
-        # Formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        fh.setFormatter(formatter)
-        ch.setFormatter(formatter)
+        fh.setFormatter(LOG_FORMATTER)
+        ch.setFormatter(LOG_FORMATTER)
         
-        logger.addHandler(fh)
-        logger.addHandler(ch)
+        # Records are queued on the calling thread and written by a
+        # background listener, so request handling never waits on disk
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        
+        self._log_listener = logging.handlers.QueueListener(
+            log_queue, fh, ch, respect_handler_level=True
+        )
+        self._log_listener.start()
+        atexit.register(self._log_listener.stop)
         
         return logger
     
     def _setup_ai_client(self):
         """Set up AI client based on configuration"""
         active_provider = self.config.active_provider
+        factory = PROVIDER_FACTORIES.get(active_provider)
         
-        if active_provider == "openai" and self.config.api_key:
-            try:
-                import openai
-                openai.api_key = self.config.api_key
-                return openai
-            except ImportError:
-                self.logger.warning("OpenAI library not available, trying fallback")
-                return self._try_fallback_providers()
-        elif active_provider == "gemini":
-            gemini_client = self._setup_gemini_client()
-            if gemini_client:
-                return gemini_client
+        if factory is not None:
+            client = factory(self)
+            if client:
+                return client
             else:
-                self.logger.warning("Gemini setup failed, trying fallback")
-                return self._try_fallback_providers()
-        elif active_provider == "anthropic":
-            try:
-                import anthropic
-                api_key = self.config.get_api_key("anthropic")
-                if api_key:
-                    return anthropic.Anthropic(api_key=api_key)
-                else:
-                    self.logger.warning("No Anthropic API key provided, trying fallback")
-                    return self._try_fallback_providers()
-            except ImportError:
-                self.logger.warning("Anthropic library not available, trying fallback")
+                self.logger.warning(f"{active_provider} setup failed, trying fallback")
                 return self._try_fallback_providers()
         elif active_provider == "ollama":
             # Ollama doesn't need API key, but we need to implement it
@@ -106,29 +156,16 @@ class NixOSAIAgent:
     
     def _try_fallback_providers(self):
         """Try fallback providers in order"""
+        # Tried one at a time so only the SDKs up to the first working
+        # provider are ever imported
         for provider in self.config.fallback_providers:
-            if provider == "gemini":
-                gemini_client = self._setup_gemini_client()
-                if gemini_client:
-                    self.logger.info(f"Using fallback provider: {provider}")
-                    return gemini_client
-            elif provider == "openai" and self.config.api_key:
-                try:
-                    import openai
-                    openai.api_key = self.config.api_key
-                    self.logger.info(f"Using fallback provider: {provider}")
-                    return openai
-                except ImportError:
-                    continue
-            elif provider == "anthropic":
-                try:
-                    import anthropic
-                    api_key = self.config.get_api_key("anthropic")
-                    if api_key:
-                        self.logger.info(f"Using fallback provider: {provider}")
-                        return anthropic.Anthropic(api_key=api_key)
-                except ImportError:
-                    continue
+            if provider not in PROVIDER_FACTORIES:
+                continue
+            
+            client = PROVIDER_FACTORIES[provider](self)
+            if client:
+                self.logger.info(f"Using fallback provider: {provider}")
+                return client
         
         self.logger.warning("All providers failed, using mock AI")
         return self._create_mock_ai()
@@ -157,7 +194,7 @@ class NixOSAIAgent:
                     }
                 }
             
-            def chat_completion(self, messages, model="gpt-4", **kwargs):
+            async def chat_completion(self, messages, model="gpt-4", **kwargs):
                 user_message = messages[-1]["content"].lower()
                 
                 # Find matching response
@@ -201,17 +238,26 @@ class NixOSAIAgent:
             
             # Configure Gemini
             genai.configure(api_key=api_key)
+            logger = self.logger
             
             # Create a wrapper class to match OpenAI interface
             class GeminiClient:
                 def __init__(self, config):
                     self.config = config
                     self.model_name = config.get("default_model", "gemini-pro")
+                    self._models = {}
                 
-                def chat_completion(self, messages, model=None, **kwargs):
+                def _get_model(self, model_name):
+                    # Reuse model objects (and their transport) across calls
+                    if model_name not in self._models:
+                        self._models[model_name] = genai.GenerativeModel(model_name)
+                    return self._models[model_name]
+                
+                async def chat_completion(self, messages, model=None, **kwargs):
                     try:
-                        # Use specified model or default
-                        model_name = model or self.model_name
+                        # Use the requested model only if it is a Gemini model,
+                        # since the request may be meant for another provider
+                        model_name = model if model in self.config.get("models", {}) else self.model_name
                         
                         # Convert messages to Gemini format
                         prompt = ""
@@ -226,8 +272,7 @@ class NixOSAIAgent:
                                 prompt += f"Assistant: {content}\n\n"
                         
                         # Generate response using Gemini
-                        model = genai.GenerativeModel(model_name)
-                        response = model.generate_content(prompt)
+                        response = await self._get_model(model_name).generate_content_async(prompt)
                         
                         # Convert to OpenAI format
                         return {
@@ -238,7 +283,7 @@ class NixOSAIAgent:
                             }]
                         }
                     except Exception as e:
-                        self.logger.error(f"Gemini API error: {e}")
+                        logger.error(f"Gemini API error: {e}")
                         return {
                             "choices": [{
                                 "message": {
@@ -259,6 +304,100 @@ class NixOSAIAgent:
             self.logger.error(f"Error setting up Gemini client: {e}")
             return None
     
+    def _setup_openai_client(self):
+        """Set up OpenAI AI client"""
+        if not self.config.api_key:
+            self.logger.warning("No OpenAI API key provided")
+            return None
+        
+        try:
+            from openai import AsyncOpenAI
+            
+            openai_config = self.config.ai_models.get("openai", {})
+            client = AsyncOpenAI(api_key=self.config.api_key)
+            
+            # Create a wrapper class returning the same format as the other providers
+            class OpenAIClient:
+                def __init__(self, config):
+                    self.model_name = config.get("default_model", "gpt-4")
+                    self.models = config.get("models", {})
+                
+                async def chat_completion(self, messages, model=None, **kwargs):
+                    # Ignore models meant for another provider
+                    model_name = model if model in self.models else self.model_name
+                    response = await client.chat.completions.create(
+                        model=model_name,
+                        messages=messages,
+                        **kwargs
+                    )
+                    
+                    return {
+                        "choices": [{
+                            "message": {
+                                "content": response.choices[0].message.content
+                            }
+                        }]
+                    }
+            
+            return OpenAIClient(openai_config)
+            
+        except ImportError:
+            self.logger.warning("OpenAI library not available. Install with: pip install openai")
+            return None
+        except Exception as e:
+            self.logger.error(f"Error setting up OpenAI client: {e}")
+            return None
+    
+    def _setup_anthropic_client(self):
+        """Set up Anthropic AI client"""
+        try:
+            import anthropic
+            
+            anthropic_config = self.config.ai_models.get("anthropic", {})
+            api_key = anthropic_config.get("api_key", "")
+            
+            if not api_key:
+                self.logger.warning("No Anthropic API key provided")
+                return None
+            
+            client = anthropic.AsyncAnthropic(api_key=api_key)
+            
+            # Create a wrapper class to match OpenAI interface
+            class AnthropicClient:
+                def __init__(self, config):
+                    self.model_name = config.get("default_model", "claude-3-opus")
+                    self.models = config.get("models", {})
+                
+                async def chat_completion(self, messages, model=None, **kwargs):
+                    # Ignore models meant for another provider
+                    model_name = model if model in self.models else self.model_name
+                    
+                    # Anthropic takes the system prompt separately from the conversation
+                    system = "\n\n".join(m["content"] for m in messages if m.get("role") == "system")
+                    response = await client.messages.create(
+                        model=model_name,
+                        max_tokens=self.models.get(model_name, {}).get("max_tokens", 2000),
+                        system=system,
+                        messages=[m for m in messages if m.get("role") != "system"]
+                    )
+                    
+                    return {
+                        "choices": [{
+                            "message": {
+                                "content": response.content[0].text
+                            }
+                        }]
+                    }
+            
+            return AnthropicClient(anthropic_config)
+            
+        except ImportError:
+            self.logger.warning("Anthropic library not available. Install with: pip install anthropic")
+            return None
+        except Exception as e:
+            self.logger.error(f"Error setting up Anthropic client: {e}")
+            return None
+    
     async def process_request(self, user_input: str) -> Dict[str, Any]:
         """Process a user request and return the result"""
         self.logger.info(f"Processing request: {user_input}")
@@ -266,32 +405,35 @@ class NixOSAIAgent:
         try:
             # Get AI response
             messages = [
-                {
-                    "role": "system", 
-                    "content": """You are a NixOS AI assistant. You can:
-1. Edit NixOS configuration files
-2. Run system commands
-3. Install packages
-4. Enable services
-
-Respond with JSON containing:
-- action: "edit_file", "run_command", or "unknown"
-- file: path to file (if editing)
-- changes: list of changes (if editing)
-- commands: list of commands to run
-- message: explanation of what you're doing
-
-Be specific and safe. Always validate changes before applying."""
-                },
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": user_input}
             ]
             
-            response = self.ai_client.chat_completion(
-                messages=messages,
-                model=self.config.model
-            )
+            # Identical requests are answered from memory before trying the
+            # slower semantic lookup
+            cache_key = self._cache_key(messages, self.config.model)
+            ai_response = self._get_exact_cached(cache_key)
+            
+            # Cached responses are only reused for the same prompt and model
+            cache_scope = hashlib.sha256(f"{self.config.model}\n{SYSTEM_PROMPT}".encode('utf-8')).hexdigest()
+            if ai_response is None and self.response_cache.enabled:
+                ai_response = await asyncio.to_thread(self.response_cache.get, user_input, cache_scope)
+            
+            if ai_response is None:
+                # The provider clients are async, so the event loop keeps
+                # serving the watcher and other requests while waiting
+                response = await self.ai_client.chat_completion(
+                    messages=messages,
+                    model=self.config.model
+                )
+                
+                content = response["choices"][0]["message"]["content"]
+                ai_response = orjson.loads(content) if orjson else json.loads(content)
+                if ai_response.get("action") != "error":
+                    self._store_exact_cached(cache_key, ai_response)
+                    if self.response_cache.enabled:
+                        await asyncio.to_thread(self.response_cache.set, user_input, cache_scope, ai_response)
             
-            ai_response = json.loads(response.choices[0].message.content)
             self.logger.info(f"AI response: {ai_response}")
             
             # Execute the action
@@ -312,6 +454,34 @@ Be specific and safe. Always validate changes before applying."""
                 "message": "Failed to process request"
             }
     
+    def _cache_key(self, messages: List[Dict[str, str]], model: str) -> str:
+        """Hash the messages and model into an exact-match cache key"""
+        payload = json.dumps(messages, sort_keys=True).encode('utf-8') + (model or "").encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+    
+    def _get_exact_cached(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return an exact-match cached response if it has not expired"""
+        cached = self._exact_cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        cached_at, response = cached
+        if time.time() - cached_at > self.config.response_cache_ttl:
+            del self._exact_cache[cache_key]
+            return None
+        
+        self.logger.info("Exact-match cache hit")
+        return response
+    
+    def _store_exact_cached(self, cache_key: str, response: Dict[str, Any]):
+        """Cache a response, dropping any entries that have expired"""
+        now = time.time()
+        ttl = self.config.response_cache_ttl
+        self._exact_cache = {
+            key: cached for key, cached in self._exact_cache.items() if now - cached[0] <= ttl
+        }
+        self._exact_cache[cache_key] = (now, response)
+    
     async def _execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the action specified by the AI"""
         action_type = action.get("action")
@@ -335,8 +505,8 @@ Be specific and safe. Always validate changes before applying."""
         if not self._is_path_allowed(file_path):
             return {"error": f"Path not allowed: {file_path}"}
         
-        # Apply changes
-        result = self.editor.apply_changes(file_path, changes)
+        # Apply changes off the event loop (validation and git shell out)
+        result = await asyncio.to_thread(self.editor.apply_changes, file_path, changes)
         
         # Run any associated commands
         commands = action.get("commands", [])
@@ -368,8 +538,8 @@ Be specific and safe. Always validate changes before applying."""
             return True
         
         path_obj = Path(path).resolve()
-        for allowed_path in self.config.allowed_paths:
-            if path_obj.is_relative_to(Path(allowed_path).resolve()):
+        for allowed_path in self.config.allowed_paths_resolved:
+            if path_obj.is_relative_to(allowed_path):
                 return True
         
         return False
@@ -378,16 +548,34 @@ Be specific and safe. Always validate changes before applying."""
         """Run the AI agent as a daemon"""
         self.logger.info("Starting NixOS AI Assistant daemon")
         
+        # Sleep until asked to stop instead of waking up to poll
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+        
         # Start the log watcher
-        await self.watcher.start()
+        watcher_task = asyncio.create_task(self.watcher.start())
         
-        # Keep running
-        try:
-            while True:
-                await asyncio.sleep(1)
-        except KeyboardInterrupt:
-            self.logger.info("Shutting down AI assistant daemon")
-            await self.watcher.stop()
+        await stop_event.wait()
+        
+        self.logger.info("Shutting down AI assistant daemon")
+        await self.watcher.stop()
+        await watcher_task
+
+# Provider setup functions. Each imports its SDK only when called, so only
+# the providers actually used are ever loaded.
+PROVIDER_FACTORIES = {
+    "openai": NixOSAIAgent._setup_openai_client,
+    "gemini": NixOSAIAgent._setup_gemini_client,
+    "anthropic": NixOSAIAgent._setup_anthropic_client
+}
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Format a request result as indented JSON"""
+    if orjson is not None:
+        return orjson.dumps(result, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(result, indent=2)
 
 def main():
     """Main entry point"""
@@ -407,25 +595,28 @@ def main():
     elif args.request:
         # Process single request
         result = asyncio.run(agent.process_request(args.request))
-        print(json.dumps(result, indent=2))
+        print(format_result(result))
     else:
         # Interactive mode
         print("NixOS AI Assistant - Interactive Mode")
         print("Type 'exit' to quit")
         
-        while True:
-            try:
-                user_input = input("\n> ").strip()
-                if user_input.lower() in ['exit', 'quit']:
+        # Run every request on one event loop so the AI client and its
+        # connections are reused for the whole session
+        with asyncio.Runner() as runner:
+            while True:
+                try:
+                    user_input = input("\n> ").strip()
+                    if user_input.lower() in ['exit', 'quit']:
+                        break
+                    
+                    if user_input:
+                        result = runner.run(agent.process_request(user_input))
+                        print(format_result(result))
+                except KeyboardInterrupt:
                     break
-                
-                if user_input:
-                    result = asyncio.run(agent.process_request(user_input))
-                    print(json.dumps(result, indent=2))
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                print(f"Error: {e}")
+                except Exception as e:
+                    print(f"Error: {e}")
 
 if __name__ == "__main__":
     main()
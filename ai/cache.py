@@ -0,0 +1,121 @@
+"""
+Response cache for NixOS AI Assistant
+Reuses AI responses for requests that mean the same thing
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import operator
+from array import array
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+class SemanticCache:
+    """Caches AI responses keyed by an embedding of the user request"""
+
+    def __init__(self, config):
+        self.config = config
+        self.logger = logging.getLogger('nixos-ai.cache')
+        self.enabled = config.semantic_cache_enabled
+        self.model_name = config.semantic_cache_model
+        self.threshold = config.semantic_cache_threshold
+        self.ttl = config.semantic_cache_ttl
+        self.db_path = Path(config.cache_directory) / "semantic_cache.db"
+
+        # Embedding model, loaded on first use
+        self._encoder = None
+
+    def _get_encoder(self):
+        """Load the sentence embedding model"""
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.model_name)
+            except ImportError:
+                self.logger.warning("sentence-transformers not available, disabling semantic cache. Install with: pip install sentence-transformers")
+                self.enabled = False
+            except Exception as e:
+                # e.g. the model cannot be downloaded; do not retry on every request
+                self.logger.warning(f"Could not load embedding model {self.model_name}, disabling semantic cache: {e}")
+                self.enabled = False
+        return self._encoder
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database, creating it if needed"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "scope TEXT NOT NULL, "
+            "embedding BLOB NOT NULL, "
+            "response TEXT NOT NULL, "
+            "cached_at REAL NOT NULL)"
+        )
+        return conn
+
+    def _embed(self, text: str) -> Optional[array]:
+        """Embed a request as a normalized float32 vector"""
+        encoder = self._get_encoder()
+        if encoder is None:
+            return None
+        vector = encoder.encode(text, normalize_embeddings=True)
+        return array('f', [float(x) for x in vector])
+
+    def get(self, user_input: str, scope: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for the most similar request, if close enough"""
+        if not self.enabled:
+            return None
+
+        try:
+            query = self._embed(user_input)
+            if query is None:
+                return None
+
+            best_score, best_response = 0.0, None
+            with closing(self._connect()) as conn, conn:
+                # Drop expired entries before looking anything up
+                conn.execute("DELETE FROM responses WHERE cached_at < ?", (time.time() - self.ttl,))
+                rows = conn.execute(
+                    "SELECT embedding, response FROM responses WHERE scope = ?", (scope,)
+                )
+                for blob, response in rows:
+                    embedding = array('f')
+                    embedding.frombytes(blob)
+                    if len(embedding) != len(query):
+                        continue
+
+                    # Embeddings are normalized, so the dot product is the cosine similarity
+                    score = sum(map(operator.mul, query, embedding))
+                    if score > best_score:
+                        best_score, best_response = score, response
+
+            if best_response is not None and best_score >= self.threshold:
+                self.logger.info(f"Semantic cache hit (similarity {best_score:.3f})")
+                return json.loads(best_response)
+
+        except Exception as e:
+            self.logger.warning(f"Semantic cache lookup failed: {e}")
+
+        return None
+
+    def set(self, user_input: str, scope: str, response: Dict[str, Any]):
+        """Store the response for a request"""
+        if not self.enabled:
+            return
+
+        try:
+            embedding = self._embed(user_input)
+            if embedding is None:
+                return
+
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT INTO responses (scope, embedding, response, cached_at) VALUES (?, ?, ?, ?)",
+                    (scope, embedding.tobytes(), json.dumps(response), time.time())
+                )
+
+        except Exception as e:
+            self.logger.warning(f"Could not store response in semantic cache: {e}")
@@ -4,8 +4,23 @@ Configuration management for NixOS AI Assistant
 
 import os
 import json
+import shutil
+import tempfile
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def fsync_directory(path: Path):
+    """Flush a directory entry to disk so a rename in it survives a crash"""
+    dir_fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
 
 class AIConfig:
     """Configuration manager for the AI assistant"""
@@ -19,6 +34,7 @@ class AIConfig:
         
         # Set up paths
         self.allowed_paths = self.config.get("allowed_paths", [self.ai_dir])
+        self.allowed_paths_resolved = self._resolve_paths(self.allowed_paths)
         self.enable_system_wide_access = self.config.get("enable_system_wide_access", False)
         
         # AI settings
@@ -28,12 +44,22 @@ class AIConfig:
         
         # Legacy support
         self.api_key = os.getenv("OPENAI_API_KEY") or self.get_api_key("openai")
-        self.model = os.getenv("AI_MODEL") or self.get_default_model("openai")
+        self.model = os.getenv("AI_MODEL") or self.get_default_model(self.active_provider)
         
         # Safety settings
         self.auto_commit = self.config.get("auto_commit", True)
         self.auto_rollback = self.config.get("auto_rollback", True)
         self.validation_required = self.config.get("validation_required", True)
+        self.max_concurrent_commands = self.config.get("safety_settings", {}).get("max_concurrent_commands", 3)
+        
+        # Response caching
+        self.cache_directory = self.config.get("cache_directory", f"{self.ai_dir}/cache")
+        self.response_cache_ttl = self.config.get("response_cache_ttl", 1800)
+        semantic_cache = self.config.get("semantic_cache", {})
+        self.semantic_cache_enabled = semantic_cache.get("enabled", False)
+        self.semantic_cache_model = semantic_cache.get("model", "sentence-transformers/all-MiniLM-L6-v2")
+        self.semantic_cache_threshold = semantic_cache.get("threshold", 0.92)
+        self.semantic_cache_ttl = semantic_cache.get("ttl", 86400)
     
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from file or create default"""
@@ -41,6 +67,9 @@ class AIConfig:
         
         if config_path.exists():
             try:
+                if orjson is not None:
+                    return orjson.loads(config_path.read_bytes())
+                
                 with open(config_path, 'r') as f:
                     return json.load(f)
             except (json.JSONDecodeError, IOError) as e:
@@ -74,16 +103,46 @@ class AIConfig:
             "max_file_size": 10485760,  # 10MB
             "backup_retention_days": 30,
             "state_directory": f"{self.ai_dir}/state",
-            "cache_directory": f"{self.ai_dir}/cache"
+            "cache_directory": f"{self.ai_dir}/cache",
+            "response_cache_ttl": 1800,
+            "semantic_cache": {
+                "enabled": False,
+                "model": "sentence-transformers/all-MiniLM-L6-v2",
+                "threshold": 0.92,
+                "ttl": 86400
+            }
         }
     
+    def _resolve_paths(self, paths: List[str]) -> Tuple[Path, ...]:
+        """Resolve allowed paths once so path checks do not stat them again"""
+        resolved = []
+        for path in paths:
+            try:
+                resolved.append(Path(path).resolve())
+            except (ValueError, OSError):
+                continue
+        return tuple(resolved)
+    
     def save_config(self):
         """Save current configuration to file"""
         config_path = Path(self.config_file)
         config_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(config_path, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        # Replace the file atomically so readers never see a partial write;
+        # the temp name is unique so concurrent saves cannot clobber it
+        fd, tmp_path = tempfile.mkstemp(dir=config_path.parent, prefix=f"{config_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.config, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            if config_path.exists():
+                shutil.copymode(config_path, tmp_path)
+            os.replace(tmp_path, config_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        fsync_directory(config_path.parent)
     
     def update_config(self, updates: Dict[str, Any]):
         """Update configuration with new values"""
@@ -92,10 +151,12 @@ class AIConfig:
         
         # Update instance variables
         self.allowed_paths = self.config.get("allowed_paths", [self.ai_dir])
+        self.allowed_paths_resolved = self._resolve_paths(self.allowed_paths)
         self.enable_system_wide_access = self.config.get("enable_system_wide_access", False)
         self.ai_models = self.config.get("ai_models", {})
         self.active_provider = self.config.get("active_provider", "openai")
         self.fallback_providers = self.config.get("fallback_providers", [])
+        self.max_concurrent_commands = self.config.get("safety_settings", {}).get("max_concurrent_commands", 3)
         self.api_key = self.get_api_key(self.active_provider)
         self.model = self.get_default_model(self.active_provider)
     
@@ -5,12 +5,14 @@ Provides safe file editing with git snapshots and validation
 
 import os
 import shutil
-import subprocess
 import tempfile
+import subprocess
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import logging
 
+from config import fsync_directory
+
 class FileEditor:
     """Safe file editor with git snapshots and validation"""
     
@@ -63,12 +65,9 @@ class FileEditor:
         if self.config.enable_system_wide_access:
             return True
         
-        for allowed_path in self.config.allowed_paths:
-            try:
-                if file_path.is_relative_to(Path(allowed_path).resolve()):
-                    return True
-            except (ValueError, OSError):
-                continue
+        for allowed_path in self.config.allowed_paths_resolved:
+            if file_path.is_relative_to(allowed_path):
+                return True
         
         return False
     
@@ -113,9 +112,21 @@ class FileEditor:
                 if not validation_result["success"]:
                     return validation_result
             
-            # Write new content
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            # Write next to the file, flush it to disk and rename over it, so
+            # a crash never leaves a half-written configuration behind; the
+            # temp name is unique so concurrent edits cannot clobber it
+            fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f"{file_path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(new_content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                shutil.copymode(file_path, tmp_path)
+                os.replace(tmp_path, file_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            fsync_directory(file_path.parent)
             
             self.logger.info(f"Applied changes to {file_path}")
             return {"success": True}
@@ -196,29 +207,22 @@ class FileEditor:
     def _validate_nix_file(self, content: str) -> Dict[str, Any]:
         """Validate Nix file syntax"""
         try:
-            # Write to temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.nix', delete=False) as f:
-                f.write(content)
-                temp_file = f.name
+            # Parse the new content from stdin instead of a temporary file
+            result = subprocess.run(
+                ['nix-instantiate', '--parse', '-'],
+                input=content,
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
             
-            try:
-                # Run nix-instantiate to check syntax
-                result = subprocess.run(
-                    ['nix-instantiate', '--parse', temp_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                if result.returncode == 0:
-                    return {"success": True}
-                else:
-                    return {
-                        "success": False,
-                        "error": f"Nix syntax error: {result.stderr}"
-                    }
-            finally:
-                os.unlink(temp_file)
+            if result.returncode == 0:
+                return {"success": True}
+            else:
+                return {
+                    "success": False,
+                    "error": f"Nix syntax error: {result.stderr}"
+                }
                 
         except subprocess.TimeoutExpired:
             return {"success": False, "error": "Nix validation timeout"}
@@ -228,21 +232,15 @@ class FileEditor:
     def _commit_changes(self, file_path: Path, changes: List[str]):
         """Commit changes to git"""
         try:
-            # Change to AI directory
-            original_cwd = os.getcwd()
-            os.chdir(self.ai_dir)
+            # Run git in the AI directory without changing the process cwd,
+            # so this is safe to call from a worker thread
+            subprocess.run(['git', 'add', str(file_path)], cwd=self.ai_dir, check=True)
             
-            try:
-                # Add file to git
-                subprocess.run(['git', 'add', str(file_path)], check=True)
-                
-                # Commit changes
-                commit_message = f"AI: Modified {file_path.name}\n\nChanges:\n" + '\n'.join(f"- {change}" for change in changes)
-                subprocess.run(['git', 'commit', '-m', commit_message], check=True)
-                
-                self.logger.info(f"Committed changes to {file_path}")
-            finally:
-                os.chdir(original_cwd)
+            # Commit changes
+            commit_message = f"AI: Modified {file_path.name}\n\nChanges:\n" + '\n'.join(f"- {change}" for change in changes)
+            subprocess.run(['git', 'commit', '-m', commit_message], cwd=self.ai_dir, check=True)
+            
+            self.logger.info(f"Committed changes to {file_path}")
                 
         except subprocess.CalledProcessError as e:
             self.logger.warning(f"Failed to commit changes: {e}")
@@ -4,14 +4,43 @@ Provides safe command execution with validation and logging
 """
 
 import os
+import re
+import time
+import signal
+import itertools
 import subprocess
 import asyncio
 import tempfile
+import functools
+import heapq
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 import json
 
+# Substrings that mark a command as potentially dangerous
+DANGEROUS_PATTERNS = [
+    'rm -rf',
+    'dd if=',
+    'mkfs',
+    'fdisk',
+    'parted',
+    'wipefs',
+    'shutdown',
+    'reboot',
+    'halt',
+    'poweroff',
+    '> /dev/',
+    '| sh',
+    'curl.*| bash',
+    'wget.*| sh'
+]
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Only the last part of each output stream is kept in memory and logged
+MAX_CAPTURED_OUTPUT = 1024 * 1024
+
 class CommandExecutor:
     """Safe command executor with validation and logging"""
     
@@ -42,14 +71,34 @@ class CommandExecutor:
             'service',
             'systemd'
         ]
+        
+        # Match every dangerous substring in a single scan
+        self._dangerous_re = re.compile('|'.join(
+            re.escape(pattern) for pattern in self.dangerous_commands + DANGEROUS_PATTERNS
+        ))
+        
+        # Commands repeat a lot (rebuilds, status checks), so remember how
+        # each normalized command was classified
+        self._classify_command = functools.lru_cache(maxsize=1024)(self._classify_normalized)
+        
+        # Distinguishes logs of commands started in the same nanosecond
+        self._log_counter = itertools.count()
+        
+        # Limit how many commands run at once (bound to the running loop)
+        self._semaphore = None
+        self._semaphore_loop = None
     
     async def run_command(self, command: str, timeout: int = 300) -> Dict[str, Any]:
         """Run a command safely with validation and logging"""
         try:
             self.logger.info(f"Executing command: {command}")
             
+            # Normalize and classify once for all the checks below
+            command_lower = self._normalize_command(command)
+            dangerous, requires_validation = self._classify_command(command_lower)
+            
             # Check if command is dangerous
-            if self._is_dangerous_command(command):
+            if dangerous:
                 return {
                     "success": False,
                     "error": "Command is considered dangerous and blocked",
@@ -57,8 +106,8 @@ class CommandExecutor:
                 }
             
             # Validate command if needed
-            if self._requires_validation(command):
-                validation_result = await self._validate_command(command)
+            if requires_validation:
+                validation_result = await self._validate_command(command, command_lower)
                 if not validation_result["success"]:
                     return validation_result
             
@@ -78,51 +127,30 @@ class CommandExecutor:
                 "command": command
             }
     
-    def _is_dangerous_command(self, command: str) -> bool:
-        """Check if command is potentially dangerous"""
-        command_lower = command.lower()
-        
-        for dangerous in self.dangerous_commands:
-            if dangerous in command_lower:
-                return True
-        
-        # Check for patterns that could be dangerous
-        dangerous_patterns = [
-            'rm -rf',
-            'dd if=',
-            'mkfs',
-            'fdisk',
-            'parted',
-            'wipefs',
-            'shutdown',
-            'reboot',
-            'halt',
-            'poweroff',
-            '> /dev/',
-            '| sh',
-            'curl.*| bash',
-            'wget.*| sh'
-        ]
+    def _normalize_command(self, command: str) -> str:
+        """Lowercase a command and collapse runs of whitespace"""
+        return _WHITESPACE_RE.sub(' ', command.lower().strip())
+    
+    def _classify_normalized(self, command_lower: str) -> Tuple[bool, bool]:
+        """Classify a normalized command as (dangerous, requires_validation)"""
+        dangerous = self._dangerous_re.search(command_lower) is not None
         
-        for pattern in dangerous_patterns:
-            if pattern in command_lower:
-                return True
+        requires_validation = command_lower.startswith(tuple(self.validation_commands))
         
-        return False
+        return dangerous, requires_validation
+    
+    def _is_dangerous_command(self, command: str) -> bool:
+        """Check if command is potentially dangerous"""
+        return self._classify_command(self._normalize_command(command))[0]
     
     def _requires_validation(self, command: str) -> bool:
         """Check if command requires validation"""
-        command_lower = command.lower()
-        
-        for validation_cmd in self.validation_commands:
-            if command_lower.startswith(validation_cmd):
-                return True
-        
-        return False
+        return self._classify_command(self._normalize_command(command))[1]
     
-    async def _validate_command(self, command: str) -> Dict[str, Any]:
+    async def _validate_command(self, command: str, command_lower: Optional[str] = None) -> Dict[str, Any]:
         """Validate a command before execution"""
-        command_lower = command.lower()
+        if command_lower is None:
+            command_lower = self._normalize_command(command)
         
         # Validate NixOS rebuild commands
         if 'nixos-rebuild' in command_lower:
@@ -130,7 +158,7 @@ class CommandExecutor:
         
         # Validate systemctl commands
         elif 'systemctl' in command_lower:
-            return await self._validate_systemctl(command)
+            return self._validate_systemctl(command)
         
         # Default validation
         return {"success": True}
@@ -155,7 +183,7 @@ class CommandExecutor:
         except Exception as e:
             return {"success": False, "error": f"Validation error: {e}"}
     
-    async def _validate_systemctl(self, command: str) -> Dict[str, Any]:
+    def _validate_systemctl(self, command: str) -> Dict[str, Any]:
         """Validate systemctl commands"""
         # Basic validation - could be expanded
         if 'stop' in command and 'nixos-ai' in command:
@@ -166,25 +194,63 @@ class CommandExecutor:
         
         return {"success": True}
     
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the command concurrency limiter for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrent_commands)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    async def _read_stream_tail(self, stream: asyncio.StreamReader) -> bytes:
+        """Read a stream to EOF, keeping only the last MAX_CAPTURED_OUTPUT bytes"""
+        buffer = bytearray()
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            buffer += chunk
+            if len(buffer) > MAX_CAPTURED_OUTPUT:
+                del buffer[:len(buffer) - MAX_CAPTURED_OUTPUT]
+        return bytes(buffer)
+    
     async def _execute_command(self, command: str, timeout: int) -> Dict[str, Any]:
         """Execute a command and return the result"""
         try:
-            # Create log file for command output
-            log_file = self.ai_dir / "logs" / f"executor_{int(asyncio.get_event_loop().time())}.log"
-            log_file.parent.mkdir(exist_ok=True)
+            # Create log file for command output, unique per run since
+            # commands can run concurrently
+            log_file = self.ai_dir / "logs" / f"executor_{time.time_ns()}_{next(self._log_counter)}.log"
+            log_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Execute command
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.ai_dir
-            )
-            
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
-            )
+            # Execute command, waiting for a free slot first
+            async with self._get_semaphore():
+                # Own process group, so a timeout can kill the whole command
+                # and not just the shell running it
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=self.ai_dir,
+                    start_new_session=True
+                )
+                
+                try:
+                    stdout, stderr, _ = await asyncio.wait_for(
+                        asyncio.gather(
+                            self._read_stream_tail(process.stdout),
+                            self._read_stream_tail(process.stderr),
+                            process.wait()
+                        ),
+                        timeout=timeout
+                    )
+                except asyncio.TimeoutError:
+                    # Stop the command before giving up its slot
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    await process.wait()
+                    raise
             
             # Decode output
             stdout_text = stdout.decode('utf-8', errors='replace')
@@ -249,17 +315,13 @@ class CommandExecutor:
     async def check_system_status(self) -> Dict[str, Any]:
         """Check system status and health"""
         try:
-            # Check NixOS configuration
-            nixos_result = await self.run_command("nixos-rebuild dry-run")
-            
-            # Check system services
-            services_result = await self.run_command("systemctl list-failed --no-pager")
-            
-            # Check disk space
-            disk_result = await self.run_command("df -h /")
-            
-            # Check memory
-            memory_result = await self.run_command("free -h")
+            # The checks are independent, so run them concurrently
+            nixos_result, services_result, disk_result, memory_result = await asyncio.gather(
+                self.run_command("nixos-rebuild dry-run"),
+                self.run_command("systemctl list-failed --no-pager"),
+                self.run_command("df -h /"),
+                self.run_command("free -h")
+            )
             
             return {
                 "success": True,
@@ -282,26 +344,26 @@ class CommandExecutor:
             if not log_dir.exists():
                 return []
             
-            # Get all executor log files
-            log_files = sorted(
-                log_dir.glob("executor_*.log"),
-                key=lambda x: x.stat().st_mtime,
-                reverse=True
-            )[:limit]
+            # Stat each executor log once and keep only the newest ones
+            log_files = heapq.nlargest(
+                limit,
+                ((log_file.stat().st_mtime, log_file) for log_file in log_dir.glob("executor_*.log"))
+            )
             
             history = []
-            for log_file in log_files:
+            for mtime, log_file in log_files:
                 try:
+                    # Only the two header lines are needed, not the output
                     with open(log_file, 'r') as f:
-                        content = f.read()
+                        command_line = f.readline().rstrip('\n')
+                        return_code_line = f.readline()
                     
                     # Parse log file (simple format)
-                    lines = content.split('\n')
-                    if len(lines) >= 3:
+                    if return_code_line.endswith('\n'):
                         history.append({
-                            "command": lines[0].replace("Command: ", ""),
-                            "return_code": int(lines[1].replace("Return code: ", "")),
-                            "timestamp": log_file.stat().st_mtime,
+                            "command": command_line.replace("Command: ", ""),
+                            "return_code": int(return_code_line.replace("Return code: ", "")),
+                            "timestamp": mtime,
                             "log_file": str(log_file)
                         })
                 except Exception as e:
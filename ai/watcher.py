@@ -21,6 +21,7 @@ class LogWatcher:
         self.ai_dir = Path(self.config.ai_dir)
         self.running = False
         self.tasks = []
+        self.processes = []
         
         # Callbacks for different types of events
         self.callbacks = {
@@ -57,6 +58,13 @@ class LogWatcher:
         
         # Wait for tasks to complete
         await asyncio.gather(*self.tasks, return_exceptions=True)
+        
+        # Stop the follower processes (journalctl -f, inotifywait, tail -F)
+        for process in self.processes:
+            if process.returncode is None:
+                process.kill()
+        await asyncio.gather(*(process.wait() for process in self.processes), return_exceptions=True)
+        self.processes = []
     
     async def _watch_system_logs(self):
         """Watch system logs for relevant events"""
@@ -67,6 +75,7 @@ class LogWatcher:
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
+            self.processes.append(process)
             
             while self.running:
                 try:
@@ -95,13 +104,9 @@ class LogWatcher:
         while self.running:
             try:
                 # Get current service status
-                result = await asyncio.create_subprocess_exec(
-                    'systemctl', 'list-units', '--type=service', '--state=failed',
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
+                stdout = await self._read_command_output(
+                    'systemctl', 'list-units', '--type=service', '--state=failed'
                 )
-                
-                stdout, _ = await result.communicate()
                 current_status = stdout.decode('utf-8', errors='replace')
                 
                 # Check for changes
@@ -125,6 +130,7 @@ class LogWatcher:
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
+            self.processes.append(process)
             
             while self.running:
                 try:
@@ -182,11 +188,13 @@ class LogWatcher:
             ai_log_file = self.ai_dir / "logs" / "ai.log"
             
             if ai_log_file.exists():
+                # Follow by name so the watcher survives log rotation
                 process = await asyncio.create_subprocess_exec(
-                    'tail', '-f', str(ai_log_file),
+                    'tail', '-F', str(ai_log_file),
                     stdout=asyncio.subprocess.PIPE,
                     stderr=asyncio.subprocess.PIPE
                 )
+                self.processes.append(process)
                 
                 while self.running:
                     try:
@@ -256,14 +264,21 @@ class LogWatcher:
     
     async def _notify_callbacks(self, event_type: str, event: Dict[str, Any]):
         """Notify registered callbacks about an event"""
-        for callback in self.callbacks.get(event_type, []):
+        pending = []
+        for callback in list(self.callbacks.get(event_type, [])):
             try:
                 if asyncio.iscoroutinefunction(callback):
-                    await callback(event)
+                    pending.append(callback(event))
                 else:
                     callback(event)
             except Exception as e:
                 self.logger.error(f"Error in callback: {e}")
+        
+        # Run async callbacks together so a slow one does not hold up the rest
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.error(f"Error in callback: {result}")
     
     def register_callback(self, event_type: str, callback: Callable):
         """Register a callback for a specific event type"""
@@ -277,32 +292,30 @@ class LogWatcher:
         if event_type in self.callbacks and callback in self.callbacks[event_type]:
             self.callbacks[event_type].remove(callback)
     
+    async def _read_command_output(self, *args: str, timeout: float = 30) -> bytes:
+        """Run a command and return its stdout, killing it after timeout seconds"""
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        return stdout
+    
     async def get_system_health(self) -> Dict[str, Any]:
         """Get current system health status"""
         try:
-            # Check system load
-            load_result = await asyncio.create_subprocess_exec(
-                'uptime',
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            load_stdout, _ = await load_result.communicate()
-            
-            # Check memory usage
-            memory_result = await asyncio.create_subprocess_exec(
-                'free', '-h',
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            memory_stdout, _ = await memory_result.communicate()
-            
-            # Check disk usage
-            disk_result = await asyncio.create_subprocess_exec(
-                'df', '-h', '/',
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            # Load, memory and disk checks are independent, so run them together
+            load_stdout, memory_stdout, disk_stdout = await asyncio.gather(
+                self._read_command_output('uptime'),
+                self._read_command_output('free', '-h'),
+                self._read_command_output('df', '-h', '/')
             )
-            disk_stdout, _ = await disk_result.communicate()
             
             return {
                 'success': True,
@@ -325,12 +338,7 @@ class LogWatcher:
         
         try:
             # Get recent system logs
-            result = await asyncio.create_subprocess_exec(
-                'journalctl', '--no-pager', '-n', str(limit),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await result.communicate()
+            stdout = await self._read_command_output('journalctl', '--no-pager', '-n', str(limit))
             
             for line in stdout.decode('utf-8', errors='replace').split('\n'):
                 if line.strip():
@@ -136,6 +136,16 @@
               "d ${aiDir}/logs 0755 root root -"
               "d ${aiDir}/backups 0755 root root -"
             ];
+
+            # Rotate the AI log; the agent reopens ai.log once it has been moved
+            services.logrotate.settings.nixos-ai = {
+              files = "${aiDir}/logs/ai.log";
+              frequency = "daily";
+              maxsize = "10M";
+              rotate = 3;
+              missingok = true;
+              notifempty = true;
+            };
           };
         };
     };
@@ -30,6 +30,16 @@ in
       "d ${aiDir}/cache 0755 root root -"
     ];
 
+    # Rotate the AI log; the agent reopens ai.log once it has been moved
+    services.logrotate.settings.nixos-ai = {
+      files = "${aiDir}/logs/ai.log";
+      frequency = "daily";
+      maxsize = "10M";
+      rotate = 3;
+      missingok = true;
+      notifempty = true;
+    };
+
     # Systemd service
     systemd.services.nixos-ai = {
       description = "NixOS AI Assistant";
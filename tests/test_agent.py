@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test suite for the AI agent
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import shutil
+import logging
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+# Add the ai directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ai'))
+
+from agent import NixOSAIAgent
+
+class TestNixOSAIAgent(unittest.TestCase):
+    """Test cases for NixOSAIAgent"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.mkdtemp()
+
+        # Keep the shared 'nixos-ai' logger free of handlers from tests
+        with patch.dict(os.environ, {"NIXOS_AI_DIR": self.test_dir}), \
+                patch.object(NixOSAIAgent, '_setup_logging', return_value=logging.getLogger('nixos-ai.test')):
+            self.agent = NixOSAIAgent(os.path.join(self.test_dir, "config.json"))
+
+        # Count provider calls made through the mock AI
+        mock_ai = self.agent._create_mock_ai()
+        self.chat_completion = AsyncMock(side_effect=mock_ai.chat_completion)
+        mock_ai.chat_completion = self.chat_completion
+        self.agent._setup_ai_client = Mock(return_value=mock_ai)
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_exact_cache_hit(self):
+        """Test that a repeated request is answered from the exact-match cache"""
+        first = asyncio.run(self.agent.process_request("add vscode"))
+        second = asyncio.run(self.agent.process_request("add vscode"))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.chat_completion.call_count, 1)
+
+    def test_exact_cache_expires(self):
+        """Test that cached responses are not reused after response_cache_ttl"""
+        asyncio.run(self.agent.process_request("add vscode"))
+
+        later = time.time() + self.agent.config.response_cache_ttl + 1
+        with patch('agent.time.time', return_value=later):
+            asyncio.run(self.agent.process_request("add vscode"))
+
+        self.assertEqual(self.chat_completion.call_count, 2)
+
+    def test_error_responses_not_cached(self):
+        """Test that error responses are not stored"""
+        self.chat_completion.side_effect = None
+        self.chat_completion.return_value = {
+            "choices": [{
+                "message": {
+                    "content": json.dumps({"action": "error", "message": "API error"})
+                }
+            }]
+        }
+
+        asyncio.run(self.agent.process_request("add vscode"))
+        asyncio.run(self.agent.process_request("add vscode"))
+
+        self.assertEqual(self.chat_completion.call_count, 2)
+        self.assertEqual(self.agent._exact_cache, {})
+
+    def test_cache_key_includes_model(self):
+        """Test that the same messages for another model use another key"""
+        messages = [{"role": "user", "content": "add vscode"}]
+        self.assertNotEqual(
+            self.agent._cache_key(messages, "gpt-4"),
+            self.agent._cache_key(messages, "gpt-3.5-turbo")
+        )
+
+        asyncio.run(self.agent.process_request("add vscode"))
+        self.agent.config.model = "gpt-3.5-turbo"
+        asyncio.run(self.agent.process_request("add vscode"))
+
+        self.assertEqual(self.chat_completion.call_count, 2)
+
+    def test_expired_entries_pruned_on_insert(self):
+        """Test that storing a response drops expired entries"""
+        expired = time.time() - self.agent.config.response_cache_ttl - 1
+        self.agent._exact_cache["stale"] = (expired, {"action": "unknown"})
+
+        asyncio.run(self.agent.process_request("add vscode"))
+
+        self.assertNotIn("stale", self.agent._exact_cache)
+        self.assertEqual(len(self.agent._exact_cache), 1)
+
+    def test_disabled_semantic_cache_skips_thread(self):
+        """Test that a disabled semantic cache is not called at all"""
+        self.assertFalse(self.agent.response_cache.enabled)
+
+        with patch('agent.asyncio.to_thread') as mock_to_thread:
+            result = asyncio.run(self.agent.process_request("hello"))
+
+        self.assertTrue(result["success"])
+        mock_to_thread.assert_not_called()
+
+    def test_client_set_up_per_event_loop(self):
+        """Test that each event loop gets a client bound to it"""
+        class LoopBoundClient:
+            """Fails like an SDK client whose connections belong to another loop"""
+            def __init__(self):
+                self.loop = None
+
+            async def chat_completion(self, messages, model=None, **kwargs):
+                loop = asyncio.get_running_loop()
+                if self.loop is not None and self.loop is not loop:
+                    raise RuntimeError("Event loop is closed")
+                self.loop = loop
+                return {
+                    "choices": [{
+                        "message": {
+                            "content": json.dumps({"action": "unknown", "message": messages[-1]["content"]})
+                        }
+                    }]
+                }
+
+        self.agent._setup_ai_client = Mock(side_effect=LoopBoundClient)
+
+        first = asyncio.run(self.agent.process_request("first request"))
+        second = asyncio.run(self.agent.process_request("second request"))
+
+        self.assertTrue(first["success"])
+        self.assertTrue(second["success"], second.get("error"))
+        self.assertEqual(self.agent._setup_ai_client.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test suite for the response cache component
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import shutil
+import unittest
+from unittest.mock import Mock, patch
+
+# Add the ai directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ai'))
+
+from cache import SemanticCache
+
+class FakeEncoder:
+    """Maps known requests to fixed unit vectors"""
+
+    vectors = {
+        "install docker": [1.0, 0.0, 0.0],
+        "please install docker": [0.96, 0.28, 0.0],
+        "add vscode": [0.0, 0.0, 1.0]
+    }
+
+    def encode(self, text, normalize_embeddings=False):
+        return self.vectors[text]
+
+class TestSemanticCache(unittest.TestCase):
+    """Test cases for SemanticCache"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.mkdtemp()
+        self.config = Mock()
+        self.config.cache_directory = os.path.join(self.test_dir, "cache")
+        self.config.semantic_cache_enabled = True
+        self.config.semantic_cache_model = "test-model"
+        self.config.semantic_cache_threshold = 0.92
+        self.config.semantic_cache_ttl = 3600
+        self.cache = SemanticCache(self.config)
+        self.cache._encoder = FakeEncoder()
+
+        self.response = {"action": "edit_file", "changes": ["services.docker.enable = true;"]}
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_similar_request_hits(self):
+        """Test that a similar request reuses the cached response"""
+        self.assertIsNone(self.cache.get("install docker", "scope"))
+
+        self.cache.set("install docker", "scope", self.response)
+        self.assertEqual(self.cache.get("install docker", "scope"), self.response)
+        self.assertEqual(self.cache.get("please install docker", "scope"), self.response)
+
+    def test_dissimilar_request_misses(self):
+        """Test that requests below the threshold or in another scope miss"""
+        self.cache.set("install docker", "scope", self.response)
+
+        self.assertIsNone(self.cache.get("add vscode", "scope"))
+        self.assertIsNone(self.cache.get("install docker", "other-scope"))
+
+    def test_expired_entries_miss(self):
+        """Test that entries older than the TTL are not reused"""
+        self.cache.set("install docker", "scope", self.response)
+
+        with patch('cache.time.time', return_value=time.time() + 7200):
+            self.assertIsNone(self.cache.get("install docker", "scope"))
+
+    def test_model_load_failure_disables_cache(self):
+        """Test that a model that fails to load is not retried on every request"""
+        cache = SemanticCache(self.config)
+        fake_module = Mock()
+        fake_module.SentenceTransformer.side_effect = OSError("model download failed")
+
+        with patch.dict(sys.modules, {"sentence_transformers": fake_module}):
+            self.assertIsNone(cache.get("install docker", "scope"))
+            self.assertIsNone(cache.get("install docker", "scope"))
+
+        self.assertFalse(cache.enabled)
+        self.assertEqual(fake_module.SentenceTransformer.call_count, 1)
+
+    def test_connections_are_closed(self):
+        """Test that every database connection is closed after use"""
+        connections = []
+        connect = sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            connections.append(connect(*args, **kwargs))
+            return connections[-1]
+
+        with patch('cache.sqlite3.connect', side_effect=tracking_connect):
+            self.cache.set("install docker", "scope", self.response)
+            self.assertEqual(self.cache.get("install docker", "scope"), self.response)
+
+        self.assertEqual(len(connections), 2)
+        for conn in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+
+    def test_disabled_cache(self):
+        """Test that a disabled cache never stores or returns responses"""
+        self.config.semantic_cache_enabled = False
+        cache = SemanticCache(self.config)
+        cache._encoder = FakeEncoder()
+
+        cache.set("install docker", "scope", self.response)
+        self.assertIsNone(cache.get("install docker", "scope"))
+        self.assertFalse(os.path.exists(self.config.cache_directory))
+
+if __name__ == "__main__":
+    unittest.main()
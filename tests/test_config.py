@@ -53,6 +53,7 @@ class TestAIConfig(unittest.TestCase):
         config = AIConfig(self.config_file)
         self.assertEqual(config.active_provider, "openai")
         self.assertIn(self.test_dir, config.allowed_paths)
+        self.assertIn(Path(self.test_dir).resolve(), config.allowed_paths_resolved)
     
     def test_api_key_retrieval(self):
         """Test API key retrieval"""
@@ -125,6 +126,41 @@ class TestAIConfig(unittest.TestCase):
         # Should have default values
         self.assertEqual(config.active_provider, "openai")
         self.assertIn("openai", config.get_available_providers())
+    
+    def test_failed_save_removes_temp_file(self):
+        """Test that a failed save keeps the old file and no temp file"""
+        config = AIConfig(self.config_file)
+        config.config["unserializable"] = object()
+        
+        with self.assertRaises(TypeError):
+            config.save_config()
+        self.assertEqual(os.listdir(self.test_dir), ["test_config.json"])
+        with open(self.config_file) as f:
+            self.assertEqual(json.load(f), self.test_config)
+    
+    def test_model_follows_active_provider(self):
+        """Test that the default model comes from the active provider"""
+        self.test_config["ai_models"]["anthropic"] = {
+            "api_key": "test-anthropic-key",
+            "models": {"claude-3-opus": {"max_tokens": 2000}},
+            "default_model": "claude-3-opus"
+        }
+        self.test_config["active_provider"] = "anthropic"
+        with open(self.config_file, 'w') as f:
+            json.dump(self.test_config, f)
+        
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("AI_MODEL", None)
+            config = AIConfig(self.config_file)
+        self.assertEqual(config.model, "claude-3-opus")
+    
+    def test_max_concurrent_commands(self):
+        """Test command concurrency limit loading"""
+        config = AIConfig(self.config_file)
+        self.assertEqual(config.max_concurrent_commands, 3)
+        
+        config.update_config({"safety_settings": {"max_concurrent_commands": 5}})
+        self.assertEqual(config.max_concurrent_commands, 5)
 
 if __name__ == "__main__":
     unittest.main()
@@ -26,6 +26,7 @@ class TestFileEditor(unittest.TestCase):
         self.config = Mock()
         self.config.ai_dir = self.test_dir
         self.config.allowed_paths = [self.test_dir]
+        self.config.allowed_paths_resolved = (Path(self.test_dir).resolve(),)
         self.config.enable_system_wide_access = False
         self.config.auto_commit = False
         self.config.validation_required = True
@@ -55,6 +56,29 @@ class TestFileEditor(unittest.TestCase):
         content = self.test_file.read_text()
         self.assertIn("services.vscode.enable = true", content)
     
+    def test_generic_file_editing_is_atomic(self):
+        """Test that edits replace the file without leftovers or mode changes"""
+        txt_file = Path(self.test_dir) / "test.txt"
+        txt_file.write_text("first line\n")
+        txt_file.chmod(0o640)
+        
+        result = self.editor.apply_changes(str(txt_file), ["second line"])
+        self.assertTrue(result["success"])
+        self.assertIn("second line", txt_file.read_text())
+        self.assertEqual(txt_file.stat().st_mode & 0o777, 0o640)
+        self.assertEqual(list(Path(self.test_dir).glob("test.txt.*tmp")), [])
+    
+    def test_failed_write_removes_temp_file(self):
+        """Test that a failed write leaves the file and no temp file behind"""
+        txt_file = Path(self.test_dir) / "test.txt"
+        txt_file.write_text("first line\n")
+        
+        with patch('editor.shutil.copymode', side_effect=OSError("copymode failed")):
+            result = self.editor._apply_file_changes(txt_file, ["second line"])
+        self.assertIn("error", result)
+        self.assertEqual(txt_file.read_text(), "first line\n")
+        self.assertEqual(list(Path(self.test_dir).glob("test.txt.*tmp")), [])
+    
     def test_path_validation(self):
         """Test path validation"""
         # Test allowed path
@@ -75,6 +99,18 @@ class TestFileEditor(unittest.TestCase):
         txt_file.write_text("test")
         self.assertFalse(self.editor._is_nix_file(txt_file))
     
+    @patch('editor.subprocess.run')
+    def test_nix_validation_reads_stdin(self, mock_run):
+        """Test that Nix validation passes content on stdin"""
+        mock_run.return_value.returncode = 0
+        
+        result = self.editor._validate_nix_file("{ }")
+        self.assertTrue(result["success"])
+        
+        args, kwargs = mock_run.call_args
+        self.assertEqual(args[0], ['nix-instantiate', '--parse', '-'])
+        self.assertEqual(kwargs["input"], "{ }")
+    
     def test_backup_creation(self):
         """Test backup creation"""
         backup_path = self.editor._create_backup(self.test_file)
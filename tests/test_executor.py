@@ -6,6 +6,8 @@ Test suite for the command executor component
 import os
 import sys
 import asyncio
+import subprocess
+import tempfile
 from pathlib import Path
 import unittest
 from unittest.mock import Mock, patch
@@ -26,6 +28,7 @@ class TestCommandExecutor(unittest.TestCase):
         self.config.allowed_paths = ["/tmp/test-ai"]
         self.config.enable_system_wide_access = False
         self.config.validation_required = True
+        self.config.max_concurrent_commands = 3
         self.executor = CommandExecutor(self.config)
     
     def test_dangerous_command_detection(self):
@@ -56,6 +59,16 @@ class TestCommandExecutor(unittest.TestCase):
             with self.subTest(command=cmd):
                 self.assertFalse(self.executor._is_dangerous_command(cmd))
     
+    def test_command_classification_normalization(self):
+        """Test that whitespace and case do not change classification"""
+        self.assertTrue(self.executor._is_dangerous_command("RM   -rf  /tmp/x"))
+        self.assertTrue(self.executor._requires_validation("  NixOS-Rebuild   switch"))
+        
+        # Repeated commands are served from the classification cache
+        self.executor._is_dangerous_command("git status")
+        self.executor._is_dangerous_command("git  status")
+        self.assertGreaterEqual(self.executor._classify_command.cache_info().hits, 1)
+    
     def test_validation_requirement_detection(self):
         """Test detection of commands requiring validation"""
         validation_commands = [
@@ -78,6 +91,34 @@ class TestCommandExecutor(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    def test_timed_out_command_is_killed(self):
+        """Test that a timed out command stops before its slot is reused"""
+        self.config.max_concurrent_commands = 1
+        executor = CommandExecutor(self.config)
+        
+        async def run_test():
+            result = await executor.run_command("sleep 7.25; true", timeout=1)
+            self.assertFalse(result["success"])
+            
+            pgrep = subprocess.run(['pgrep', '-f', 'sleep 7.25'], capture_output=True)
+            self.assertNotEqual(pgrep.returncode, 0)
+        
+        asyncio.run(run_test())
+    
+    def test_command_output_is_capped(self):
+        """Test that only the tail of large command output is kept"""
+        from executor import MAX_CAPTURED_OUTPUT
+        
+        async def run_test():
+            result = await self.executor.run_command(
+                f"yes | head -c {MAX_CAPTURED_OUTPUT + 4096}; echo end"
+            )
+            self.assertTrue(result["success"])
+            self.assertEqual(len(result["stdout"]), MAX_CAPTURED_OUTPUT)
+            self.assertTrue(result["stdout"].endswith("end\n"))
+        
+        asyncio.run(run_test())
+    
     def test_command_failure(self):
         """Test handling of command failures"""
         async def run_test():
@@ -96,6 +137,22 @@ class TestCommandExecutor(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    def test_concurrent_command_limit(self):
+        """Test that concurrent commands are bounded by the configured limit"""
+        self.config.max_concurrent_commands = 1
+        
+        async def run_test():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await asyncio.gather(
+                self.executor.run_command("sleep 0.2"),
+                self.executor.run_command("sleep 0.2")
+            )
+            self.assertTrue(all(result["success"] for result in results))
+            self.assertGreaterEqual(loop.time() - start, 0.4)
+        
+        asyncio.run(run_test())
+    
     @patch('subprocess.run')
     def test_nixos_rebuild_validation(self, mock_run):
         """Test NixOS rebuild validation"""
@@ -110,11 +167,44 @@ class TestCommandExecutor(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    def test_concurrent_commands_log_separately(self):
+        """Test that commands run together each get their own log file"""
+        async def run_test():
+            results = await asyncio.gather(
+                self.executor.run_command("echo a"),
+                self.executor.run_command("echo b"),
+                self.executor.run_command("echo c")
+            )
+            log_files = {result["log_file"] for result in results}
+            self.assertEqual(len(log_files), 3)
+            for result in results:
+                with open(result["log_file"]) as f:
+                    self.assertEqual(f.readline(), f"Command: {result['command']}\n")
+        
+        asyncio.run(run_test())
+    
     def test_command_history(self):
         """Test command history retrieval"""
         # This test would require actual log files, so we'll just test the method exists
         history = self.executor.get_command_history(limit=10)
         self.assertIsInstance(history, list)
+    
+    def test_command_history_parsing(self):
+        """Test parsing of executor log headers"""
+        with tempfile.TemporaryDirectory() as test_dir:
+            self.config.ai_dir = test_dir
+            executor = CommandExecutor(self.config)
+            log_dir = Path(test_dir) / "logs"
+            log_dir.mkdir()
+            (log_dir / "executor_1.log").write_text(
+                "Command: echo hi\nReturn code: 0\nSTDOUT:\nhi\n\nSTDERR:\n\n"
+            )
+            (log_dir / "executor_2.log").write_text("Command: truncated")
+            
+            history = executor.get_command_history(limit=10)
+            self.assertEqual(len(history), 1)
+            self.assertEqual(history[0]["command"], "echo hi")
+            self.assertEqual(history[0]["return_code"], 0)
 
 if __name__ == "__main__":
     unittest.main()